@@ -1,4 +1,7 @@
 OUTPUT_DIR = "ensemble_results"
 INPUT_DIR = "ensemble_results/input"
 CSV_DIR = "ensemble_results/evidence_logs"
-VISUALS_DIR = "ensemble_results/visuals"
\ No newline at end of file
+VISUALS_DIR = "ensemble_results/visuals"
+IMGSZ = 640
+BATCH_SIZE = 8
+SAVE_CLEAN_VISUALS = True  # Also save a visual for images with nothing above VISUAL_CUTOFF
\ No newline at end of file
@@ -1,4 +1,5 @@
 from ultralytics import YOLO
+import config
 
 
 def train_custom_model():
@@ -10,17 +11,19 @@ def train_custom_model():
     # 2. Train the model
     # data: Path to your data.yaml file (defined in Step 1)
     # epochs: 50-100 is usually good for a specialized task
-    # imgsz: 640 is standard
+    # imgsz: must match config.IMGSZ, the size EnsembleEvidenceDetector letterboxes to for both models
     print("[INFO] Starting training for Guns and Blood Stains...")
 
     results = model.train(
         data='datasets/gun_blood_data/data.yaml',
         epochs=10,
-        imgsz=416,
-        cache=True,
+        imgsz=config.IMGSZ,
+        cache='ram',  # Decoded images held in RAM instead of re-read from disk every epoch
         workers=4,
         freeze=10,
-        batch=16,
+        batch=-1,  # Let Ultralytics pick the largest batch that fits in GPU memory
+        amp=True,  # Mixed-precision (FP16) training
+        # device left unset: Ultralytics trains on the first GPU if there is one, else on the CPU
         name='gun_blood_model',  # Results saved to runs/detect/gun_blood_model
         patience=10  # Stop early if no improvement
     )
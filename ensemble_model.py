@@ -1,30 +1,130 @@
 import cv2
+import numpy as np
+import torch
 from ultralytics import YOLO
-import pandas as pd
+from ultralytics.data.augment import LetterBox
+from ultralytics.utils import ops
+from ultralytics.utils.nms import non_max_suppression
 from datetime import datetime
 import os
+import csv
 import glob
+import io
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import config
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Row type of csv_data, a structured array with one field per report column (variable-length text as objects)
+CSV_DTYPE = np.dtype([
+    ("Timestamp", "U26"), ("Image", "O"), ("Model_Source", "U14"), ("Evidence_Type", "O"), ("Category", "u1"),
+    ("Confidence_Score", "f8"), ("Confidence_Text", "U7"), ("Visualized", "U3"), ("Coords", "O"),
+])
+
+# Column order of csv_data and of the saved *_FULL_REPORT.csv files
+CSV_COLUMNS = CSV_DTYPE.names
+
+# Evidence categories; a row's Category is the index into this tuple
+CATEGORY_NAMES = ("weapon", "person", "digital", "general")
+
+
+def _write_bytes(path, data):
+    """
+    Writes a whole file with unbuffered write() calls (normally one) instead of a stream of 8 KiB buffered ones.
+    Loops on short writes, so the file is either complete or an OSError is raised.
+    """
+    view = memoryview(data)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _encode_visual(image):
+    """
+    JPEG bytes of an annotated image, as saved to *_ANALYSIS.jpg.
+    """
+    ok, buf = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def _encode_report(csv_rows):
+    """
+    CSV bytes of a report (header + csv_data rows), built in memory so it is written in one go like the JPEG.
+    """
+    report = io.StringIO(newline='')
+    writer = csv.writer(report)
+    writer.writerow(CSV_COLUMNS)
+    writer.writerows(csv_rows.tolist())
+    return report.getvalue().encode()
+
+
+def load_image(image_path):
+    """
+    Reads a BGR image file at full resolution, or returns None if unreadable.
+    The models see it through the letterbox, which is the only resize.
+    """
+    return cv2.imread(image_path, cv2.IMREAD_COLOR)
+
+
+def decode_image(data):
+    """
+    Decodes encoded image bytes (e.g. an upload) to BGR at full resolution, or returns None if undecodable.
+    Like load_image, the letterbox is the only resize the models' copy goes through.
+    """
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def run_stages(steps, on_stage=None):
+    """
+    Drains a generator of (stage, pct) progress updates, passing each to on_stage if given.
+    Returns the generator's return value (e.g. _analyze_array_iter's result).
+    """
+    while True:
+        try:
+            update = next(steps)
+        except StopIteration as done:
+            return done.value
+        if on_stage is not None:
+            on_stage(update)
+
 
 class EnsembleEvidenceDetector:
-    def __init__(self, standard_weights='yolov8l.pt', custom_weights='best.pt'):
+    def __init__(self, standard_weights='yolov8l.pt', custom_weights='best.pt',
+                 enabled_sources=('standard', 'custom'), standard_classes=None, custom_classes=None):
         """
-        Initializes BOTH models to cover all evidence types.
+        Initializes the enabled models to cover the requested evidence types.
+        enabled_sources: 'standard' (COCO) and/or 'custom' (Gun/Blood). Disabled models are never loaded.
+        standard_classes / custom_classes: optional subsets of class IDs to detect (default: all evidence classes).
         """
-        print("[INIT] Loading Standard COCO Model (People, Knives, etc.)...")
-        self.model_standard = YOLO(standard_weights)
+        self.enabled_sources = set(enabled_sources)
+
+        if 'standard' in self.enabled_sources:
+            print("[INIT] Loading Standard COCO Model (People, Knives, etc.)...")
+            self.model_standard = self._load_model(standard_weights)
+        else:
+            self.model_standard = None
 
-        if os.path.exists(custom_weights):
+        if 'custom' not in self.enabled_sources:
+            self.model_custom = None
+        elif os.path.exists(custom_weights):
             print(f"[INIT] Loading Custom Forensic Model ({custom_weights})...")
-            self.model_custom = YOLO(custom_weights)
+            self.model_custom = self._load_model(custom_weights)
 
         else:
             print(f"[WARNING] Custom weights '{custom_weights}' not found! Gun/Blood detection will be skipped.")
             self.model_custom = None
 
         # --- CONFIGURATION ---
-        self.VISUAL_CUTOFF = 0.30  # Only draw on image if > 35%
+        self.DETECT_CUTOFF = 0.25  # Boxes below this never leave NMS
+        self.VISUAL_CUTOFF = 0.30  # Only draw on image if > 30%
 
         # 1. Standard Model Targets (COCO IDs)
         self.std_classes = {
@@ -46,6 +146,12 @@ class EnsembleEvidenceDetector:
             1: "Blood Stain"
         }
 
+        # Restrict to the requested subsets (also narrows the classes= filter passed to NMS)
+        if standard_classes is not None:
+            self.std_classes = {k: v for k, v in self.std_classes.items() if k in standard_classes}
+        if custom_classes is not None:
+            self.cust_classes = {k: v for k, v in self.cust_classes.items() if k in custom_classes}
+
         # 3. Color Palette
         self.colors = {
             "biohazard": (0, 0, 139),  # Dark Red (Blood)
@@ -57,110 +163,413 @@ class EnsembleEvidenceDetector:
             "text": (255, 255, 255),  # White
             "bg_label": (50, 50, 50)  # Dark Grey
         }
+        # Both maps key on integer IDs (0 is Person and Gun), so collect labels without merging them
+        self.label_color = {label: self._pick_color(label)
+                            for label in (*self.std_classes.values(), *self.cust_classes.values())}
+        self.label_category = {label: self._pick_category(label)
+                               for label in (*self.std_classes.values(), *self.cust_classes.values())}
+        self._text_size_cache = {}  # label text -> cv2.getTextSize result
+
+        # 4. Shared Preprocessing (one letterbox + upload feeds both models)
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.letterbox = LetterBox(new_shape=(config.IMGSZ, config.IMGSZ), auto=False)
+        # Two pinned host buffers, alternated per batch, so uploads can be issued non-blocking
+        if self.device == 'cuda':
+            self._pinned = [torch.empty((config.BATCH_SIZE, config.IMGSZ, config.IMGSZ, 3), dtype=torch.uint8)
+                            .pin_memory() for _ in range(2)]
+            self._pinned_idx = 0
+            # Side CUDA stream + worker thread: the custom model's forward overlaps the standard model's
+            self._side_stream = torch.cuda.Stream()
+            self._side_pool = ThreadPoolExecutor(max_workers=1)
+
+        # Serializes every predict + process (batches and single images): the pinned buffers, side pool,
+        # backends and label size cache are shared when the detector is used from several threads (e.g. the UI)
+        self._lock = threading.Lock()
+
+        # 5. Background Writer (JPEG encode + CSV write overlap with the next predict)
+        self.write_q = queue.Queue(maxsize=8)
+        # (path, exception) of the latest output files the writer failed to save; bounded, since a shared
+        # detector (e.g. the UI's) lives as long as the process. write_error_count keeps the running total.
+        self.write_errors = deque(maxlen=100)
+        self.write_error_count = 0
+        threading.Thread(target=self._writer_loop, daemon=True).start()
+
+    def _pick_color(self, label):
+        """
+        Maps an evidence label to its box color. Evaluated once per label in __init__.
+        """
+        if "Blood" in label:
+            return self.colors["biohazard"]
+        elif "Gun" in label:
+            return self.colors["weapon_gun"]
+        elif "Knife" in label:
+            return self.colors["weapon_knife"]
+        elif "Person" in label:
+            return self.colors["person"]
+        elif "Phone" in label or "Laptop" in label:
+            return self.colors["digital"]
+        else:
+            return self.colors["general"]
+
+    def _pick_category(self, label):
+        """
+        Maps an evidence label to its CATEGORY_NAMES index. Evaluated once per label in __init__.
+        """
+        if "Gun" in label or "Knife" in label:
+            return 0  # weapon
+        elif label == "Person":
+            return 1  # person
+        elif "Phone" in label or "Laptop" in label:
+            return 2  # digital
+        else:
+            return 3  # general
+
+    def _load_model(self, weights):
+        """
+        Loads the fastest available format of a model, exporting it next to the .pt file on first use:
+        a TensorRT FP16 engine on GPU, an OpenVINO FP16 (or existing ONNX) model on CPU.
+        Falls back to the PyTorch weights when the export fails (and, via _export's marker file, keeps doing so).
+        """
+        stem = os.path.splitext(weights)[0]
+        model_path = weights
+
+        if torch.cuda.is_available():
+            engine_path = stem + '.engine'
+            if not os.path.exists(engine_path):
+                self._export(weights, format='engine', half=True, simplify=True, workspace=4)
+            if os.path.exists(engine_path):
+                model_path = engine_path
+        else:
+            openvino_dir = stem + '_openvino_model'
+            onnx_path = stem + '.onnx'
+            if not os.path.exists(openvino_dir) and not os.path.exists(onnx_path):
+                self._export(weights, format='openvino', half=True)
+            if os.path.exists(openvino_dir):
+                model_path = openvino_dir
+            elif os.path.exists(onnx_path):
+                model_path = onnx_path
+
+        model = YOLO(model_path, task='detect')
+
+        # Warm-up: the first predict call builds the predictor and allocates its buffers
+        model.predict(np.zeros((config.IMGSZ, config.IMGSZ, 3), dtype=np.uint8), verbose=False)
+        return model
+
+    def _export(self, weights, **export_args):
+        """
+        One-time export of .pt weights with a dynamic batch of up to BATCH_SIZE. Export errors are only reported,
+        and recorded in a <stem>.<format>.export_failed marker so later runs skip the (slow) retry.
+        Delete the marker to try the export again.
+        """
+        marker = f"{os.path.splitext(weights)[0]}.{export_args['format']}.export_failed"
+        if os.path.exists(marker):
+            print(f"[INFO] Skipping {export_args['format']} export of {weights}: it failed before ({marker}).")
+            return
+
+        print(f"[INIT] Exporting {weights} to {export_args['format']} (one-time)...")
+        try:
+            YOLO(weights).export(imgsz=config.IMGSZ, dynamic=True, batch=config.BATCH_SIZE, **export_args)
+        except Exception as e:
+            print(f"[WARNING] {export_args['format']} export failed ({e}). Using PyTorch weights.")
+            try:
+                with open(marker, 'w') as f:
+                    f.write(f"{e}\n")
+            except OSError:
+                pass  # Read-only weights folder: the export is simply retried next run
 
     def process_directory(self, input_dir, output_root=config.OUTPUT_DIR):
         csv_dir = os.path.join(output_root, "evidence_logs")
         visuals_dir = os.path.join(output_root, "visuals")
-        input_dir = os.path.join(output_root, "input")
         os.makedirs(csv_dir, exist_ok=True)
         os.makedirs(visuals_dir, exist_ok=True)
-        os.makedirs(input_dir, exist_ok=True)
 
-        image_files = glob.glob(input_dir)
+        image_files = sorted(p for p in glob.glob(os.path.join(input_dir, '*'))
+                             if p.lower().endswith(IMAGE_EXTENSIONS))
 
         print(f"[INFO] Found {len(image_files)} images. Starting Ensemble Scan...")
+        errors_before = self.write_error_count
+
+        # Both models see a whole batch per predict call instead of one image at a time
+        images, base_names = [], []
+        for img_path, image in self._prefetch(image_files):
+            if image is None:
+                print(f"[ERROR] Skipped corrupt file: {img_path}")
+                continue
+            images.append(image)
+            base_names.append(os.path.splitext(os.path.basename(img_path))[0])
+
+            if len(images) == config.BATCH_SIZE:
+                self._run_batch(images, base_names, csv_dir, visuals_dir)
+                images, base_names = [], []
+
+        if images:
+            self._run_batch(images, base_names, csv_dir, visuals_dir)
+
+        # Wait for the writer thread to finish saving everything queued
+        self.write_q.join()
+        failed = self.write_error_count - errors_before
+        if failed:
+            print(f"\n[WARNING] {failed} output file(s) could not be saved:")
+            for path, e in list(self.write_errors)[-failed:]:
+                print(f"   - {path}: {e}")
+        print(f"\n[COMPLETE] Results saved to '{output_root}/'")
 
-        for img_path in image_files:
-            self._analyze_image(img_path, csv_dir, visuals_dir)
+    def _prefetch(self, image_files, workers=4):
+        """
+        Decodes images on a thread pool so JPEG/PNG decoding overlaps with inference.
+        Keeps up to two batches in flight and yields (image_path, image) in order, as returned by load_image.
+        """
+        files = iter(image_files)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for img_path in files:
+                pending.append((img_path, pool.submit(load_image, img_path)))
+                if len(pending) == config.BATCH_SIZE * 2: break
+
+            while pending:
+                img_path, future = pending.popleft()
+                next_path = next(files, None)
+                if next_path is not None:
+                    pending.append((next_path, pool.submit(load_image, next_path)))
+                yield img_path, future.result()
+
+    def _run_batch(self, images, base_names, csv_dir, visuals_dir):
+        with self._lock:
+            results = self._predict_batch(images)
+            for image, base_name, (res_std, res_cust) in zip(images, base_names, results):
+                self._process_results(image, base_name, res_std, res_cust, csv_dir, visuals_dir)
+
+        # Drop this batch's result tensors and hand cached blocks back once per batch (not per image)
+        del results, res_std, res_cust
+        if self.device == 'cuda':
+            torch.cuda.empty_cache()
+
+    def _writer_loop(self):
+        """
+        Drains (visual_path, image, csv_path, csv_rows) jobs from write_q and saves them to disk.
+        """
+        while True:
+            visual_path, image, csv_path, csv_rows = self.write_q.get()
+            try:
+                if visual_path is not None:
+                    self._save(visual_path, lambda: _encode_visual(image))
+                if len(csv_rows):
+                    self._save(csv_path, lambda: _encode_report(csv_rows))
+            finally:
+                self.write_q.task_done()
+
+    def _save(self, path, encode):
+        """
+        Encodes and writes one output file on the writer thread.
+        A failure is logged and recorded in write_errors (reported by process_directory and the UI) instead of being lost.
+        """
+        try:
+            _write_bytes(path, encode())
+        except Exception as e:
+            self.write_errors.append((path, e))
+            self.write_error_count += 1
+            print(f"[ERROR] Could not save '{path}': {e}")
+
+    def _preprocess(self, images):
+        """
+        Letterboxes a list of BGR images into one normalized RGB (B, 3, IMGSZ, IMGSZ) tensor on the device.
+        On GPU the uint8 batch is staged in pinned memory and uploaded asynchronously.
+        """
+        batch = torch.from_numpy(np.stack([self.letterbox(image=img) for img in images]))
+        if self.device == 'cuda':
+            pinned = self._pinned[self._pinned_idx][:len(images)]
+            self._pinned_idx ^= 1
+            pinned.copy_(batch)
+            batch = pinned
+
+        tensor = batch.to(self.device, non_blocking=True)
+        # BGR->RGB, BHWC->BCHW and normalization happen on the device
+        return tensor.flip(-1).permute(0, 3, 1, 2).float().div(255.0).contiguous()
+
+    def _predict_batch(self, images):
+        """
+        Runs each model over a list of BGR images, sharing a single preprocessed input tensor.
+        Returns one (standard_dets, custom_dets) pair per image; dets is None when its model is not loaded.
+        Boxes stay on the device in letterboxed (IMGSZ x IMGSZ) coordinates; _decode_boxes maps them back.
+        """
+        # inference_mode: no autograd bookkeeping and no tensor refs kept alive for backward
+        with torch.inference_mode():
+            tensor = self._preprocess(images)
+
+            # --- PASS 2: CUSTOM MODEL (Guns/Blood) ---
+            # Started first on GPU: it runs on the side stream while pass 1 runs on this thread
+            if self.model_custom and self.model_standard and self.device == 'cuda':
+                # The side stream must not read the input before the upload/normalization has finished
+                self._side_stream.wait_stream(torch.cuda.current_stream())
+                tensor.record_stream(self._side_stream)  # keep the allocator from reusing it while the side stream reads
+                future = self._side_pool.submit(self._predict_side, self.model_custom, tensor, self.cust_classes)
+            elif self.model_custom:
+                future = None
+                cust_dets = self._forward(self.model_custom, tensor, self.cust_classes)
+            else:
+                future = None
+                cust_dets = [None] * len(images)
+
+            # --- PASS 1: STANDARD MODEL ---
+            if self.model_standard:
+                std_dets = self._forward(self.model_standard, tensor, self.std_classes)
+            else:
+                std_dets = [None] * len(images)
+
+            if future is not None:
+                cust_dets = self._side_results(future)
+
+        return list(zip(std_dets, cust_dets))
+
+    def _forward(self, model, tensor, class_map):
+        """
+        Runs a model's backend on the shared input tensor and applies NMS, without going through predict():
+        its postprocess copies a tensor input back to the host as NumPy frames for Results we never use.
+        Returns one (N, 6) [x1, y1, x2, y2, conf, cls] device tensor per image.
+        """
+        # predictor.model is the AutoBackend built by the warm-up in _load_model (handles FP16/engine/OpenVINO input)
+        preds = model.predictor.model(tensor)
+        # classes= makes NMS drop non-evidence classes instead of filtering them in Python
+        return non_max_suppression(preds, self.DETECT_CUTOFF, 0.5, classes=list(class_map))
 
-        print(f"\n[COMPLETE] Results saved to '{output_root}/'")
+    def _predict_side(self, model, tensor, class_map):
+        """
+        Runs a model over the whole batch on the side CUDA stream. Executed on the side worker thread.
+        """
+        with torch.inference_mode(), torch.cuda.stream(self._side_stream):
+            return self._forward(model, tensor, class_map)
+
+    def _side_results(self, future):
+        """
+        Returns the side worker's detections once it is done, after ordering this thread's stream behind the side stream.
+        """
+        dets = future.result()
+        torch.cuda.current_stream().wait_stream(self._side_stream)
+        return dets
+
+    def _decode_boxes(self, dets, class_map, image_shape):
+        """
+        Copies an image's (N, 6) detections to the CPU in one transfer and keeps only the classes in class_map.
+        Returns (cls, conf, xyxy) NumPy arrays, with xyxy as integer pixels of image_shape
+        (mapped back from the letterboxed input) and clamped to it.
+        """
+        dets = dets.cpu().numpy()
+        cls = dets[:, 5].astype(np.int32)
+        conf = dets[:, 4]
+        xyxy = dets[:, :4]
+
+        mask = np.isin(cls, np.fromiter(class_map, dtype=np.int32))
+        xyxy = ops.scale_boxes((config.IMGSZ, config.IMGSZ), xyxy[mask], image_shape)
+
+        # Clamp to stay within image (one vector op per axis)
+        img_h, img_w = image_shape[:2]
+        xyxy[:, 0::2] = np.clip(xyxy[:, 0::2], 0, img_w)
+        xyxy[:, 1::2] = np.clip(xyxy[:, 1::2], 0, img_h)
+        return cls[mask], conf[mask], xyxy.astype(np.int32)
+
+    def _merge_detections(self, decoded):
+        """
+        Merges the (source, class_map, cls, conf, xyxy) outputs of both models into one list of
+        (source, label, conf, [x1, y1, x2, y2]) tuples, ordered by confidence (highest first).
+        The ordering is a single argsort over the concatenated scores; .tolist() converts each array in one call.
+        The two models detect disjoint classes, so no cross-model box suppression is needed.
+        """
+        if not decoded:
+            return []
+
+        detections = []
+        for source, class_map, cls, conf, xyxy in decoded:
+            detections += [(source, class_map[cls_id], score, box)
+                           for cls_id, score, box in zip(cls.tolist(), conf.tolist(), xyxy.tolist())]
+
+        order = np.argsort(-np.concatenate([conf for _, _, _, conf, _ in decoded]), kind='stable')
+        return [detections[i] for i in order.tolist()]
 
     def _analyze_image(self, image_path, csv_dir=config.CSV_DIR, visuals_dir=config.VISUALS_DIR):
-        image = cv2.imread(image_path)
+        image = load_image(image_path)
         if image is None: return
         base_name = os.path.splitext(os.path.basename(image_path))[0]
+        return self._analyze_array(image, base_name, csv_dir, visuals_dir)
 
+    def _analyze_array(self, image, base_name, csv_dir=config.CSV_DIR, visuals_dir=config.VISUALS_DIR):
+        """
+        Analyzes an already decoded BGR image, e.g. an in-memory upload. base_name names the saved reports.
+        """
+        return run_stages(self._analyze_array_iter(image, base_name, csv_dir, visuals_dir))
+
+    def _analyze_array_iter(self, image, base_name, csv_dir=config.CSV_DIR, visuals_dir=config.VISUALS_DIR):
+        """
+        Generator version of _analyze_array for progress reporting: yields (stage, pct) before each stage
+        and returns (annotated_img, csv_data). Drain it with run_stages.
+        """
+        # The writer thread saves into these; nothing else creates them outside process_directory
+        os.makedirs(csv_dir, exist_ok=True)
+        os.makedirs(visuals_dir, exist_ok=True)
+        with self._lock:
+            yield "🧠 Running standard & custom models...", 20
+            res_std, res_cust = self._predict_batch([image])[0]
+            yield "🎯 Logging & drawing detections...", 85
+            return self._process_results(image, base_name, res_std, res_cust, csv_dir, visuals_dir)
+
+    def _process_results(self, image, base_name, res_std, res_cust, csv_dir=config.CSV_DIR,
+                         visuals_dir=config.VISUALS_DIR):
+        """
+        Filters, logs and draws the pre-computed detections of both models for one image.
+        Boxes are mapped back to the full-resolution image, so drawings and CSV coordinates are in source pixels.
+        """
         # Get Image Dimensions for Boundary Checks
-        img_h, img_w = image.shape[:2]
-
-        master_log = []
-        log_args = {"project": "yolo_internal_logs", "name": "inference", "exist_ok": True}
-
-        # --- PASS 1: STANDARD MODEL ---
-        res_std = self.model_standard.predict(image, conf=0.001, iou=0.5, verbose=False, **log_args)[0]
-        for box in res_std.boxes:
-            cls_id = int(box.cls[0])
-            if cls_id in self.std_classes:
-                master_log.append({
-                    "Source": "Standard_Model",
-                    "Label": self.std_classes[cls_id],
-                    "Conf": float(box.conf[0]),
-                    "Box": box.xyxy[0].tolist()
-                })
-
-        # --- PASS 2: CUSTOM MODEL (Guns/Blood) ---
-        if self.model_custom:
-            res_cust = self.model_custom.predict(image, conf=0.001, iou=0.5, verbose=False, **log_args)[0]
-            for box in res_cust.boxes:
-                cls_id = int(box.cls[0])
-                if cls_id in self.cust_classes:
-                    master_log.append({
-                        "Source": "Custom_Model",
-                        "Label": self.cust_classes[cls_id],
-                        "Conf": float(box.conf[0]),
-                        "Box": box.xyxy[0].tolist()
-                    })
+        img_w = image.shape[1]
+
+        # One clock read per image: every row of the report shares it
+        timestamp = datetime.now().isoformat()
+
+        decoded = []
+        for source, result, class_map in (("Standard_Model", res_std, self.std_classes),
+                                          ("Custom_Model", res_cust, self.cust_classes)):
+            if result is None: continue
+            decoded.append((source, class_map, *self._decode_boxes(result, class_map, image.shape)))
+        detections = self._merge_detections(decoded)
 
         # --- PASS 3: PROCESSING & VISUALIZATION ---
-        annotated_img = image.copy()
-        csv_data = []
-
-        for item in master_log:
-            label = item['Label']
-            conf = item['Conf']
-            x1, y1, x2, y2 = map(int, item['Box'])
-
-            # Clamp coordinates to stay within image (Just in case)
-            x1 = max(0, x1);
-            y1 = max(0, y1)
-            x2 = min(img_w, x2);
-            y2 = min(img_h, y2)
-
-            # A. Add to CSV Data
-            csv_data.append({
-                "Timestamp": datetime.now().isoformat(),
-                "Image": base_name,
-                "Model_Source": item['Source'],
-                "Evidence_Type": label,
-                "Confidence_Score": conf,
-                "Confidence_Text": f"{conf:.2%}",
-                "Visualized": "YES" if conf > self.VISUAL_CUTOFF else "NO",
-                "Coords": [x1, y1, x2, y2]
-            })
+        # Only pay for the full-frame copy when at least one box will be drawn
+        has_visuals = any(conf > self.VISUAL_CUTOFF for _, _, conf, _ in detections)
+        annotated_img = image.copy() if has_visuals else image
+
+        # A. CSV Data (preallocated, filled one column at a time)
+        csv_data = np.empty(len(detections), dtype=CSV_DTYPE)
+        if detections:
+            sources, labels, confs, boxes = zip(*detections)
+            confs = np.array(confs)
+            csv_data["Timestamp"] = timestamp
+            csv_data["Image"] = base_name
+            csv_data["Model_Source"] = sources
+            csv_data["Evidence_Type"] = labels
+            csv_data["Category"] = [self.label_category[label] for label in labels]
+            csv_data["Confidence_Score"] = confs
+            csv_data["Confidence_Text"] = np.char.mod("%.2f%%", confs * 100)
+            csv_data["Visualized"] = np.where(confs > self.VISUAL_CUTOFF, "YES", "NO")
+            # Coords in source pixels, as "[x1, y1, x2, y2]"
+            csv_data["Coords"] = [str(box) for box in boxes]
+
+        for source, label, conf, box in detections:
+            x1, y1, x2, y2 = box
 
             # B. Draw Visuals (High Confidence Only)
             if conf > self.VISUAL_CUTOFF:
                 # Color Selection
-                if "Blood" in label:
-                    c = self.colors["biohazard"]
-                elif "Gun" in label:
-                    c = self.colors["weapon_gun"]
-                elif "Knife" in label:
-                    c = self.colors["weapon_knife"]
-                elif "Person" in label:
-                    c = self.colors["person"]
-                elif "Phone" in label or "Laptop" in label:
-                    c = self.colors["digital"]
-                else:
-                    c = self.colors["general"]
+                c = self.label_color[label]
 
                 # Draw Box
                 cv2.rectangle(annotated_img, (x1, y1), (x2, y2), c, 2)
 
                 # --- BOUNDARY AWARE LABEL DRAWING ---
                 lbl = f"{label} {conf:.0%}"
-                # Get text size
-                (text_w, text_h), baseline = cv2.getTextSize(lbl, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)
+                # Get text size (cached: font/scale/thickness are fixed, so it only depends on lbl)
+                text_size = self._text_size_cache.get(lbl)
+                if text_size is None:
+                    text_size = self._text_size_cache.setdefault(
+                        lbl, cv2.getTextSize(lbl, cv2.FONT_HERSHEY_SIMPLEX, 1, 2))
+                (text_w, text_h), baseline = text_size
 
                 # Default: Draw ABOVE the box
                 # Coordinates for background rectangle
@@ -195,13 +604,12 @@ class EnsembleEvidenceDetector:
                 cv2.putText(annotated_img, lbl, (text_x, text_y),
                             cv2.FONT_HERSHEY_SIMPLEX, 1, self.colors["text"], 2)
 
-        # --- SAVING ---
-        if csv_data:
-            df = pd.DataFrame(csv_data)
-            df = df.sort_values(by="Confidence_Score", ascending=False)
-            df.to_csv(os.path.join(csv_dir, f"{base_name}_FULL_REPORT.csv"), index=False)
-
-        cv2.imwrite(os.path.join(visuals_dir, f"{base_name}_ANALYSIS.jpg"), annotated_img)
+        # --- SAVING (handed off to the writer thread) ---
+        visual_path = None
+        if has_visuals or config.SAVE_CLEAN_VISUALS:
+            visual_path = os.path.join(visuals_dir, f"{base_name}_ANALYSIS.jpg")
+        csv_path = os.path.join(csv_dir, f"{base_name}_FULL_REPORT.csv")
+        self.write_q.put((visual_path, annotated_img, csv_path, csv_data))
         print(f" > Processed {base_name}: {len(csv_data)} items logged.")
 
         return annotated_img, csv_data
@@ -215,6 +623,6 @@ if __name__ == "__main__":
         custom_weights='Custom_Model/weights/best.pt',
     )
 
-    INPUT_FOLDER = "crime_scenes/scene_1.png"
+    INPUT_FOLDER = "crime_scenes"
 
-    detector.analyze_crime_scene(INPUT_FOLDER)
\ No newline at end of file
+    detector.process_directory(INPUT_FOLDER)
\ No newline at end of file
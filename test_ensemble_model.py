@@ -0,0 +1,24 @@
+import numpy as np
+import torch
+
+import config
+from ensemble_model import EnsembleEvidenceDetector
+
+
+def test_process_results_logs_and_draws_person(tmp_path):
+    # No sources enabled: nothing is loaded or exported, only the tables and writer are set up
+    detector = EnsembleEvidenceDetector(enabled_sources=())
+    image = np.zeros((config.IMGSZ, config.IMGSZ, 3), dtype=np.uint8)
+    # One NMS output row [x1, y1, x2, y2, conf, cls] in letterboxed coordinates; COCO 0 = Person (shares ID 0 with Gun)
+    res_std = torch.tensor([[100.0, 100.0, 300.0, 400.0, 0.9, 0.0]])
+
+    annotated_img, csv_data = detector._process_results(image, "scene", res_std, None,
+                                                        str(tmp_path), str(tmp_path))
+    detector.write_q.join()
+
+    assert csv_data["Evidence_Type"].tolist() == ["Person"]
+    assert csv_data["Category"].tolist() == [1]
+    assert csv_data["Visualized"].tolist() == ["YES"]
+    assert (annotated_img[400, 100:300] == detector.colors["person"]).all()  # bottom edge (the label covers the top)
+    assert (tmp_path / "scene_FULL_REPORT.csv").exists()
+    assert (tmp_path / "scene_ANALYSIS.jpg").exists()
@@ -1,13 +1,14 @@
 import streamlit as st
-import cv2
-import pandas as pd
+import streamlit.components.v1 as components
+import base64
 from datetime import datetime
 import os
-import io
-from PIL import Image
-import numpy as np
-from ensemble_model import EnsembleEvidenceDetector
-from config import INPUT_DIR
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+# cv2, pandas, numpy and ensemble_model (torch + ultralytics) are imported where first used,
+# so the page paints before the heavy modules load
 
 # Page configuration
 st.set_page_config(
@@ -17,10 +18,69 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+STANDARD_WEIGHTS = 'yolov8l.pt'
+CUSTOM_WEIGHTS = 'Custom_Model/weights/best.pt'
+INLINE_PREVIEW_BYTES = 1_000_000  # Larger uploads are previewed with st.image instead of an inline data: URI
+
+_FONTS_CSS = """
+    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;600;700;800;900&family=Inter:wght@300;400;500;600;700;800&display=swap');
+"""
+
+# Shared by the page theme and the help-card iframe (which does not inherit the page's styles)
+_INFO_CARD_CSS = """
+    /* Premium Card Design - Light Purple/Pink - Reduced Height */
+    .info-card {
+        background: linear-gradient(135deg, #faf5ff 0%, #fce7f3 100%);
+        border: 2px solid #e9d5ff;
+        border-radius: 12px;
+        padding: 1.2rem 1.5rem;
+        margin-bottom: 1rem;
+        position: relative;
+        overflow: hidden;
+        transition: all 0.3s ease;
+        box-shadow: 0 2px 12px rgba(168, 85, 247, 0.08);
+    }
+
+    .info-card::before {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: 0;
+        width: 3px;
+        height: 100%;
+        background: linear-gradient(180deg, #a855f7 0%, #ec4899 100%);
+    }
+
+    .info-card:hover {
+        transform: translateY(-3px);
+        border-color: #d8b4fe;
+        box-shadow: 0 6px 20px rgba(168, 85, 247, 0.15);
+    }
+"""
+
+# Card heading and list text styles (formerly repeated inline), used by the page and the help-card iframe
+_CARD_TEXT_CSS = """
+    .card-title {
+        color: #2563eb;
+        font-family: 'Orbitron', sans-serif;
+        letter-spacing: 2px;
+    }
+
+    .card-list {
+        color: #4b5563;
+        line-height: 2;
+        font-size: 1.05rem;
+    }
+
+    .card-list strong {
+        color: #2563eb;
+    }
+"""
+
 # Professional Light Theme with Crime Scene Tape
-st.markdown("""
+_CSS_RAW = """
     <style>
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;600;700;800;900&family=Inter:wght@300;400;500;600;700;800&display=swap');
+    """ + _FONTS_CSS + """
 
     /* Root Variables */
     :root {
@@ -128,35 +188,7 @@ st.markdown("""
         border: 1px solid rgba(255, 255, 255, 0.3);
     }
 
-    /* Premium Card Design - Light Purple/Pink - Reduced Height */
-    .info-card {
-        background: linear-gradient(135deg, #faf5ff 0%, #fce7f3 100%);
-        border: 2px solid #e9d5ff;
-        border-radius: 12px;
-        padding: 1.2rem 1.5rem;
-        margin-bottom: 1rem;
-        position: relative;
-        overflow: hidden;
-        transition: all 0.3s ease;
-        box-shadow: 0 2px 12px rgba(168, 85, 247, 0.08);
-    }
-
-    .info-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 3px;
-        height: 100%;
-        background: linear-gradient(180deg, #a855f7 0%, #ec4899 100%);
-    }
-
-    .info-card:hover {
-        transform: translateY(-3px);
-        border-color: #d8b4fe;
-        box-shadow: 0 6px 20px rgba(168, 85, 247, 0.15);
-    }
-
+    """ + _INFO_CARD_CSS + _CARD_TEXT_CSS + """
     .feature-card {
         background: linear-gradient(135deg, #faf5ff 0%, #fce7f3 100%);
         border: 1px solid #e9d5ff;
@@ -207,6 +239,18 @@ st.markdown("""
         line-height: 1.6;
     }
 
+    .feature-card strong {
+        color: #2563eb;
+    }
+
+    /* Stat Row - three equal boxes in one element */
+    .stat-grid {
+        display: grid;
+        grid-template-columns: repeat(3, 1fr);
+        gap: 1rem;
+        margin-bottom: 1.5rem;
+    }
+
     /* Professional Stat Boxes - Light Purple - Compact */
     .stat-box {
         background: linear-gradient(135deg, #faf5ff 0%, #fce7f3 100%);
@@ -668,50 +712,356 @@ st.markdown("""
         }
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+# Static page blocks, written together in a single st.markdown call per run. Kept flush-left: after the
+# minified <style> line an indented block would be parsed as a Markdown code block.
+_HEADER_HTML = """
+<div class="header-container">
+    <h1 class="header-title">🔍 CRIME SCENE ANALYZER</h1>
+    <p class="header-subtitle">AI-POWERED FORENSIC EVIDENCE DETECTION SYSTEM</p>
+    <div style="text-align: center; margin-top: 1rem;">
+        <span class="header-badge">⚡ REAL-TIME ANALYSIS</span>
+        <span class="header-badge">🔒 SECURE PROCESSING</span>
+        <span class="header-badge">🎯 DUAL AI MODELS</span>
+    </div>
+</div>
+"""
+
+_STATS_HTML = """
+<div class="stat-grid">
+    <div class="stat-box">
+        <div class="stat-icon">🤖</div>
+        <p class="stat-number">2</p>
+        <p class="stat-label">AI Models</p>
+    </div>
+    <div class="stat-box">
+        <div class="stat-icon">🎯</div>
+        <p class="stat-number">11+</p>
+        <p class="stat-label">Evidence Types</p>
+    </div>
+    <div class="stat-box">
+        <div class="stat-icon">⚡</div>
+        <p class="stat-number">30%</p>
+        <p class="stat-label">Min Confidence</p>
+    </div>
+</div>
+"""
+
+_UPLOAD_CARD_HTML = """
+<div class="info-card">
+    <h3 style="color: #a855f7; margin-top: 0; font-family: 'Orbitron', sans-serif; letter-spacing: 2px;">📤 UPLOAD CRIME SCENE IMAGE</h3>
+    <p style="color: #6b7280; margin-bottom: 0; line-height: 1.6;">
+        Upload a crime scene photograph for AI-powered evidence detection and analysis.
+        Supported formats: <strong style="color: #a855f7;">JPG, JPEG, PNG</strong>
+    </p>
+</div>
+"""
+
+_SIDEBAR_CARDS_HTML = """
+<div class="feature-card">
+    <h4>🎯 DETECTION CAPABILITIES</h4>
+    <ul style="font-size: 0.95rem;">
+        <li>Persons & Suspects</li>
+        <li>Weapons (Guns, Knives)</li>
+        <li>Blood Stains</li>
+        <li>Digital Evidence</li>
+        <li>Personal Items</li>
+        <li>Containers & Objects</li>
+    </ul>
+</div>
+<div class="feature-card">
+    <h4>⚙️ AI CONFIGURATION</h4>
+    <p style="font-size: 0.9rem; line-height: 1.8;">
+        <strong>Standard Model:</strong> YOLOv8 Large<br>
+        <strong>Custom Model:</strong> Forensic Specialist<br>
+        <strong>Thresholds:</strong> 25% Logged, 30% Drawn
+    </p>
+</div>
+"""
+
+_HOWTO_HTML = """
+<div class="info-card" style="margin-top: 2rem;">
+    <h3 class="card-title">📖 HOW TO USE</h3>
+    <ol class="card-list">
+        <li><strong>Upload Image:</strong> Click the upload button above and select a crime scene photograph</li>
+        <li><strong>Analyze:</strong> Click the "ANALYZE EVIDENCE" button to process the image</li>
+        <li><strong>Review Results:</strong> View detected evidence with confidence scores and visual annotations</li>
+        <li><strong>Download Reports:</strong> Export detailed CSV reports and annotated images</li>
+    </ol>
+</div>
+"""
+
+_NOTES_HTML = """
+<div class="info-card">
+    <h3 class="card-title">⚠️ IMPORTANT NOTES</h3>
+    <ul class="card-list">
+        <li>This system uses advanced AI models for evidence detection</li>
+        <li>Results should be verified by forensic professionals</li>
+        <li>Detections of 25% confidence and above are logged to the CSV report</li>
+        <li>Detections above 30% confidence are drawn and shown in the summary</li>
+        <li>Weapon detections trigger critical alerts with pulsing indicators</li>
+    </ul>
+</div>
+"""
+
+_STATIC_CARDS_HTML = _HOWTO_HTML + _NOTES_HTML
+
+# Stand-alone document for the help-card iframe, with the fonts and card styles it needs
+_STATIC_CARDS_DOC = """
+<style>
+    """ + _FONTS_CSS + """
+    * {
+        font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
+    }
 
+    body {
+        margin: 0;
+        padding: 4px 2px;
+        background: transparent;
+    }
 
-def main():
-    # Professional Header
+    /* Same heading color the page theme forces */
+    h3 {
+        color: #1f2937 !important;
+    }
+    """ + _INFO_CARD_CSS + _CARD_TEXT_CSS + """
+</style>
+""" + _STATIC_CARDS_HTML
+_STATIC_CARDS_HEIGHT = 620  # px; fits both cards in the wide layout, the iframe scrolls when they reflow taller
+
+
+def _collapse_whitespace(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+@st.cache_data
+def _css():
+    """
+    Theme stylesheet with comments stripped and whitespace collapsed, computed once per process.
+    """
+    return _collapse_whitespace(re.sub(r'/\*.*?\*/', '', _CSS_RAW, flags=re.S))
+
+
+@st.cache_data
+def _static_cards_html():
+    """
+    HOW TO USE and IMPORTANT NOTES cards (as an iframe document) with whitespace collapsed, computed once per process.
+    """
+    return _collapse_whitespace(_STATIC_CARDS_DOC)
+
+
+@st.cache_resource(show_spinner=False)
+def _lazy_detector_module():
+    """
+    Imports ensemble_model (and with it torch and ultralytics) on first use instead of at page load.
+    """
+    import ensemble_model
+    return ensemble_model
+
+
+@st.cache_resource(show_spinner=False)
+def get_detector(standard_weights, custom_weights):
+    """
+    Builds the detector once per weights pair and shares it across reruns and sessions.
+    """
+    detector_cls = _lazy_detector_module().EnsembleEvidenceDetector
+    return detector_cls(standard_weights=standard_weights, custom_weights=custom_weights)
+
+
+def _warm_up_detector():
+    """
+    Thread target for start_warm_up: builds the default detector into get_detector's cache.
+    """
+    try:
+        get_detector(STANDARD_WEIGHTS, CUSTOM_WEIGHTS)
+    except Exception as e:
+        # Failures are not cached: the first analysis retries the load and surfaces the error
+        print(f"[WARNING] Background model warm-up failed: {e}")
+
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """
+    Starts loading the detector on a daemon thread, once per process, while the landing page renders.
+    A click that arrives mid-load waits on get_detector's cache for the same instance.
+    """
+    thread = threading.Thread(target=_warm_up_detector, daemon=True)
+    thread.start()
+    return thread
+
+
+start_warm_up()
+
+
+@st.cache_resource
+def get_executor():
+    """
+    Worker pool that runs inference off the Streamlit script thread.
+    """
+    return ThreadPoolExecutor(max_workers=2)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def run_inference(img_bytes, base_name, standard_weights, custom_weights, _progress=None):
+    """
+    Decodes an upload and runs the ensemble on it. Cached on the raw bytes, so re-analyzing the same image is free.
+    _progress: optional list that (stage, pct) updates are appended to (underscore: not part of the cache key).
+    Returns (display_jpg_bytes, png_bytes, csv_data), or None if the bytes are not a decodable image.
+    Only what the page reads is returned (and cached): the encoded annotated image, not the full-resolution array.
+    """
+    ensemble_model = _lazy_detector_module()
+    import cv2
+    on_stage = _progress.append if _progress is not None else None
+
+    # Decode the upload straight from memory (BGR, full resolution for display and download)
+    if on_stage: on_stage(("🖼️ Decoding image...", 5))
+    image = ensemble_model.decode_image(img_bytes)
+    if image is None:
+        return None
+    detector = get_detector(standard_weights, custom_weights)
+    steps = detector._analyze_array_iter(image, base_name)
+    annotated_img, csv_data = ensemble_model.run_stages(steps, on_stage)
+
+    # JPEG for display (a fraction of the PNG st.image would encode and send on every rerun), PNG for download
+    _, jpg = cv2.imencode('.jpg', annotated_img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    _, png = cv2.imencode('.png', annotated_img)
+    return jpg.tobytes(), png.tobytes(), csv_data
+
+
+@st.fragment
+def render_results():
+    """
+    Evidence summary, report table and downloads for the last analysis (read from session_state).
+    A fragment: interacting with it (e.g. a download button) reruns only this block, not the whole page.
+    """
+    # Evidence summary
+    st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("""
-        <div class="header-container">
-            <h1 class="header-title">🔍 CRIME SCENE ANALYZER</h1>
-            <p class="header-subtitle">AI-POWERED FORENSIC EVIDENCE DETECTION SYSTEM</p>
-            <div style="text-align: center; margin-top: 1rem;">
-                <span class="header-badge">⚡ REAL-TIME ANALYSIS</span>
-                <span class="header-badge">🔒 SECURE PROCESSING</span>
-                <span class="header-badge">🎯 DUAL AI MODELS</span>
-            </div>
+        <div class="results-container">
+            <h3 class="result-header">📊 EVIDENCE SUMMARY</h3>
         </div>
     """, unsafe_allow_html=True)
 
+    # Add spacing between header and metrics
+    st.markdown('<div style="margin-top: 1.5rem;"></div>', unsafe_allow_html=True)
+
+    if not st.session_state['df_full'].empty:
+        import numpy as np
+
+        high_conf_df = st.session_state['df_high']
+
+        if not high_conf_df.empty:
+            # Statistics
+            col1, col2, col3, col4 = st.columns(4)
+
+            with col1:
+                total_evidence = len(high_conf_df)
+                st.metric("TOTAL EVIDENCE", total_evidence, delta="High Confidence")
+
+            # Category codes come from the detector (index into CATEGORY_NAMES: 0 weapon, 1 person)
+            categories = high_conf_df['Category'].to_numpy()
+
+            with col2:
+                weapons = int((categories == 0).sum())
+                st.metric("WEAPONS DETECTED", weapons, delta="⚠️ Critical" if weapons > 0 else "✅ None",
+                          delta_color="inverse" if weapons > 0 else "normal")
+
+            with col3:
+                persons = int((categories == 1).sum())
+                st.metric("PERSONS IDENTIFIED", persons)
+
+            with col4:
+                avg_conf = high_conf_df['Confidence_Score'].mean()
+                st.metric("AVG CONFIDENCE", f"{avg_conf:.1%}")
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            # Evidence badges
+            st.markdown("""
+                <h4 class="card-title">
+                    🏷️ DETECTED EVIDENCE TYPES
+                </h4>
+            """, unsafe_allow_html=True)
+
+            labels = high_conf_df['Evidence_Type'].to_numpy()
+            confs = high_conf_df['Confidence_Text'].to_numpy()
+            badge_lut = np.array([f'badge-{name}' for name in _lazy_detector_module().CATEGORY_NAMES])
+            badge_classes = badge_lut[categories]
+
+            evidence_html = ''.join(
+                f'<span class="evidence-badge {badge_class}">{label} ({conf})</span>'
+                for label, conf, badge_class in zip(labels, confs, badge_classes)
+            )
+
+            st.markdown(evidence_html, unsafe_allow_html=True)
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            # Detailed table
+            st.markdown("""
+                <h4 class="card-title">
+                    📋 DETAILED EVIDENCE REPORT
+                </h4>
+            """, unsafe_allow_html=True)
+
+            display_df = high_conf_df[['Evidence_Type', 'Confidence_Text', 'Model_Source', 'Visualized']].copy()
+            display_df.columns = ['Evidence Type', 'Confidence', 'Detection Model', 'Visualized']
+            st.dataframe(display_df, use_container_width=True, hide_index=True)
+
+            # Download options
+            st.markdown("<br>", unsafe_allow_html=True)
+            col1, col2 = st.columns(2)
+
+            with col1:
+                # Download CSV
+                st.download_button(
+                    label="📥 DOWNLOAD FULL REPORT (CSV)",
+                    data=st.session_state['csv_bytes'],
+                    file_name=f"evidence_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+
+            with col2:
+                # Download annotated image (PNG encoded once per analysis, not on every rerun)
+                st.download_button(
+                    label="🖼️ DOWNLOAD ANNOTATED IMAGE",
+                    data=st.session_state['png_bytes'],
+                    file_name=f"annotated_scene_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
+                    mime="image/png",
+                    use_container_width=True
+                )
+        else:
+            st.info("ℹ️ No high-confidence evidence detected in this image.")
+    else:
+        st.info("ℹ️ No evidence detected in this image.")
+
+
+def _render_help():
+    """
+    Help & Notes expander (collapsed until opened), drawn on every full-page run.
+    """
+    with st.expander("📖 Help & Notes", expanded=False):
+        # Static HTML goes straight into an iframe, skipping the markdown renderer
+        components.html(_static_cards_html(), height=_STATIC_CARDS_HEIGHT, scrolling=True)
+
+
+def main():
+    # Theme, header, stats and upload card in one element (re-emitted every run: Streamlit drops
+    # elements a rerun doesn't write)
+    st.markdown(_css() + _HEADER_HTML + _STATS_HTML + _UPLOAD_CARD_HTML, unsafe_allow_html=True)
+
     # Sidebar
     with st.sidebar:
         st.markdown("### 📋 SYSTEM INFORMATION")
-        st.markdown("""
-            <div class="feature-card">
-                <h4>🎯 DETECTION CAPABILITIES</h4>
-                <ul style="font-size: 0.95rem;">
-                    <li>Persons & Suspects</li>
-                    <li>Weapons (Guns, Knives)</li>
-                    <li>Blood Stains</li>
-                    <li>Digital Evidence</li>
-                    <li>Personal Items</li>
-                    <li>Containers & Objects</li>
-                </ul>
-            </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_SIDEBAR_CARDS_HTML, unsafe_allow_html=True)
 
-        st.markdown("""
-            <div class="feature-card">
-                <h4>⚙️ AI CONFIGURATION</h4>
-                <p style="font-size: 0.9rem; line-height: 1.8;">
-                    <strong style="color: #2563eb;">Standard Model:</strong> YOLOv8 Large<br>
-                    <strong style="color: #2563eb;">Custom Model:</strong> Forensic Specialist<br>
-                    <strong style="color: #2563eb;">Threshold:</strong> 30% Confidence
-                </p>
-            </div>
-        """, unsafe_allow_html=True)
+        # Drop the cached detector (and results it produced) so the weights are reloaded on the next analysis
+        if st.button("♻️ RELOAD AI MODELS", use_container_width=True):
+            get_detector.clear()
+            run_inference.clear()
+            st.caption("Model cache cleared.")
 
         st.markdown("---")
         st.markdown("""
@@ -723,50 +1073,6 @@ def main():
             </div>
         """, unsafe_allow_html=True)
 
-    # Main Stats
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        st.markdown("""
-            <div class="stat-box">
-                <div class="stat-icon">🤖</div>
-                <p class="stat-number">2</p>
-                <p class="stat-label">AI Models</p>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        st.markdown("""
-            <div class="stat-box">
-                <div class="stat-icon">🎯</div>
-                <p class="stat-number">11+</p>
-                <p class="stat-label">Evidence Types</p>
-            </div>
-        """, unsafe_allow_html=True)
-
-    with col3:
-        st.markdown("""
-            <div class="stat-box">
-                <div class="stat-icon">⚡</div>
-                <p class="stat-number">30%</p>
-                <p class="stat-label">Min Confidence</p>
-            </div>
-        """, unsafe_allow_html=True)
-
-    # Add spacing between sections
-    st.markdown('<div style="margin-top: 1.5rem;"></div>', unsafe_allow_html=True)
-
-    # Upload Section
-    st.markdown("""
-        <div class="info-card">
-            <h3 style="color: #a855f7; margin-top: 0; font-family: 'Orbitron', sans-serif; letter-spacing: 2px;">📤 UPLOAD CRIME SCENE IMAGE</h3>
-            <p style="color: #6b7280; margin-bottom: 0; line-height: 1.6;">
-                Upload a crime scene photograph for AI-powered evidence detection and analysis.
-                Supported formats: <strong style="color: #a855f7;">JPG, JPEG, PNG</strong>
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-
     uploaded_file = st.file_uploader(
         "Choose an image file",
         type=['jpg', 'jpeg', 'png'],
@@ -784,48 +1090,77 @@ def main():
                     <h3 class="result-header">📸 ORIGINAL IMAGE</h3>
                 </div>
             """, unsafe_allow_html=True)
-            image = Image.open(uploaded_file)
-            st.markdown('<div class="image-container">', unsafe_allow_html=True)
-            st.image(image, use_container_width=True)
-            img_path = os.path.join(INPUT_DIR, uploaded_file.name)
-            with open(img_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-
-            st.markdown('</div>', unsafe_allow_html=True)
+            img_bytes = uploaded_file.getvalue()
+            if len(img_bytes) <= INLINE_PREVIEW_BYTES:
+                # Small uploads are shown from their own bytes: no server-side decode and re-encode
+                b64 = base64.b64encode(img_bytes).decode()
+                st.markdown(f'<div class="image-container"><img src="data:{uploaded_file.type};base64,{b64}" '
+                            f'style="width: 100%; display: block;"/></div>', unsafe_allow_html=True)
+            else:
+                # Large ones go through the media file cache: a URL the browser can cache, instead of
+                # a base64 copy (+33%) inlined into a markdown delta and re-parsed on every rerun
+                st.image(img_bytes, use_container_width=True)
 
         # Process button
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("🔍 ANALYZE EVIDENCE", use_container_width=True):
-            with st.spinner("🔄 PROCESSING IMAGE WITH AI MODELS..."):
-                # Convert PIL to CV2
-                img_array = np.array(image)
-                img_cv2 = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-
-                # Initialize detector
-                detector = EnsembleEvidenceDetector(
-                    standard_weights='yolov8l.pt',
-                    custom_weights='Custom_Model/weights/best.pt'
-                )
-
-                # Analyze
-                annotated_img, csv_data = detector._analyze_image(img_path)
-
-                # Convert back to RGB for display
-                annotated_img_rgb = cv2.cvtColor(annotated_img, cv2.COLOR_BGR2RGB)
+            with st.status("🔄 PROCESSING IMAGE WITH AI MODELS...", expanded=True) as status:
+                progress_bar = st.progress(0)
+
+                # Cached detector (weights are only loaded on the first analysis, if the warm-up hasn't yet)
+                status.update(label="⏳ Loading AI models...")
+                import pandas as pd
+                detector = get_detector(STANDARD_WEIGHTS, CUSTOM_WEIGHTS)
+                errors_before = detector.write_error_count
+
+                base_name = os.path.splitext(uploaded_file.name)[0]
+
+                # Analyze on a worker thread; torch/OpenCV release the GIL, so the script thread
+                # stays free to show each stage the worker reports until the result is ready
+                stages = []
+                future = get_executor().submit(run_inference, uploaded_file.getvalue(), base_name,
+                                               STANDARD_WEIGHTS, CUSTOM_WEIGHTS, _progress=stages)
+                shown = 0
+                while not future.done():
+                    if len(stages) > shown:
+                        shown = len(stages)
+                        stage, pct = stages[-1]
+                        status.update(label=stage)
+                        progress_bar.progress(pct)
+                    time.sleep(0.05)
+                progress_bar.progress(100)
+                result = future.result()
+                if result is None:
+                    status.update(label="❌ Could not decode the uploaded image.", state="error")
+                    st.stop()
+                display_bytes, png_bytes, csv_data = result
+
+                # Wait for this analysis' report/visual to reach the disk, so failed saves show with its results
+                detector.write_q.join()
+                failed = detector.write_error_count - errors_before
+                st.session_state['write_errors'] = list(detector.write_errors)[-failed:] if failed else []
+
+                # Build the report tables once per analysis; reruns only read them back
+                df = pd.DataFrame(csv_data)  # structured array: columns and dtypes come from its fields
+                df = df.sort_values(by="Confidence_Score", ascending=False)
 
-                # Store in session state
-                st.session_state['annotated_img'] = annotated_img_rgb
-                st.session_state['csv_data'] = csv_data
+                # Store in session state (encoded once by run_inference; reruns only read them back)
+                st.session_state['png_bytes'] = png_bytes
+                st.session_state['annotated_display_bytes'] = display_bytes
+                st.session_state['df_full'] = df
+                st.session_state['df_high'] = df[df['Confidence_Score'] > 0.30]  # High confidence detections
+                st.session_state['csv_bytes'] = df.to_csv(index=False).encode()
+                status.update(label="✅ ANALYSIS COMPLETE", state="complete", expanded=False)
 
-                # Success message
-                st.markdown("""
-                    <div class="success-message">
-                        ✅ ANALYSIS COMPLETE! Evidence detected and classified.
-                    </div>
-                """, unsafe_allow_html=True)
+            # Success message (outside the status box, which collapses when done)
+            st.markdown("""
+                <div class="success-message">
+                    ✅ ANALYSIS COMPLETE! Evidence detected and classified.
+                </div>
+            """, unsafe_allow_html=True)
 
         # Display results if available
-        if 'annotated_img' in st.session_state and 'csv_data' in st.session_state:
+        if 'png_bytes' in st.session_state and 'df_full' in st.session_state:
             with col2:
                 st.markdown("""
                     <div class="results-container">
@@ -833,147 +1168,18 @@ def main():
                     </div>
                 """, unsafe_allow_html=True)
                 st.markdown('<div class="image-container">', unsafe_allow_html=True)
-                st.image(st.session_state['annotated_img'], use_container_width=True)
+                st.image(st.session_state['annotated_display_bytes'], use_container_width=True)
                 st.markdown('</div>', unsafe_allow_html=True)
 
-            # Evidence summary
-            st.markdown("<br>", unsafe_allow_html=True)
-            st.markdown("""
-                <div class="results-container">
-                    <h3 class="result-header">📊 EVIDENCE SUMMARY</h3>
-                </div>
-            """, unsafe_allow_html=True)
-
-            # Add spacing between header and metrics
-            st.markdown('<div style="margin-top: 1.5rem;"></div>', unsafe_allow_html=True)
-
-            if st.session_state['csv_data']:
-                df = pd.DataFrame(st.session_state['csv_data'])
-                df = df.sort_values(by="Confidence_Score", ascending=False)
+            if st.session_state.get('write_errors'):
+                st.warning("⚠️ Some result files could not be saved:\n" + "\n".join(
+                    f"- `{path}`: {e}" for path, e in st.session_state['write_errors']))
 
-                # Filter high confidence detections
-                high_conf_df = df[df['Confidence_Score'] > 0.30]
-
-                if not high_conf_df.empty:
-                    # Statistics
-                    col1, col2, col3, col4 = st.columns(4)
-
-                    with col1:
-                        total_evidence = len(high_conf_df)
-                        st.metric("TOTAL EVIDENCE", total_evidence, delta="High Confidence")
-
-                    with col2:
-                        weapons = len(
-                            high_conf_df[high_conf_df['Evidence_Type'].str.contains('Gun|Knife', case=False, na=False)])
-                        st.metric("WEAPONS DETECTED", weapons, delta="⚠️ Critical" if weapons > 0 else "✅ None",
-                                  delta_color="inverse" if weapons > 0 else "normal")
-
-                    with col3:
-                        persons = len(high_conf_df[high_conf_df['Evidence_Type'] == 'Person'])
-                        st.metric("PERSONS IDENTIFIED", persons)
-
-                    with col4:
-                        avg_conf = high_conf_df['Confidence_Score'].mean()
-                        st.metric("AVG CONFIDENCE", f"{avg_conf:.1%}")
-
-                    st.markdown("<br>", unsafe_allow_html=True)
-
-                    # Evidence badges
-                    st.markdown("""
-                        <h4 style="color: #2563eb; font-family: 'Orbitron', sans-serif; letter-spacing: 2px;">
-                            🏷️ DETECTED EVIDENCE TYPES
-                        </h4>
-                    """, unsafe_allow_html=True)
-
-                    evidence_html = ""
-                    for _, row in high_conf_df.iterrows():
-                        label = row['Evidence_Type']
-                        conf = row['Confidence_Text']
-
-                        if 'Gun' in label or 'Knife' in label:
-                            badge_class = "badge-weapon"
-                        elif 'Person' in label:
-                            badge_class = "badge-person"
-                        elif 'Phone' in label or 'Laptop' in label:
-                            badge_class = "badge-digital"
-                        else:
-                            badge_class = "badge-general"
-
-                        evidence_html += f'<span class="evidence-badge {badge_class}">{label} ({conf})</span>'
-
-                    st.markdown(evidence_html, unsafe_allow_html=True)
-
-                    st.markdown("<br>", unsafe_allow_html=True)
-
-                    # Detailed table
-                    st.markdown("""
-                        <h4 style="color: #2563eb; font-family: 'Orbitron', sans-serif; letter-spacing: 2px;">
-                            📋 DETAILED EVIDENCE REPORT
-                        </h4>
-                    """, unsafe_allow_html=True)
-
-                    display_df = high_conf_df[['Evidence_Type', 'Confidence_Text', 'Model_Source', 'Visualized']].copy()
-                    display_df.columns = ['Evidence Type', 'Confidence', 'Detection Model', 'Visualized']
-                    st.dataframe(display_df, use_container_width=True, hide_index=True)
-
-                    # Download options
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        # Download CSV
-                        csv = df.to_csv(index=False)
-                        st.download_button(
-                            label="📥 DOWNLOAD FULL REPORT (CSV)",
-                            data=csv,
-                            file_name=f"evidence_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                            mime="text/csv",
-                            use_container_width=True
-                        )
-
-                    with col2:
-                        # Download annotated image using BytesIO
-                        img_pil = Image.fromarray(st.session_state['annotated_img'])
-                        buf = io.BytesIO()
-                        img_pil.save(buf, format='PNG')
-                        buf.seek(0)
-                        st.download_button(
-                            label="🖼️ DOWNLOAD ANNOTATED IMAGE",
-                            data=buf,
-                            file_name=f"annotated_scene_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
-                            mime="image/png",
-                            use_container_width=True
-                        )
-                else:
-                    st.info("ℹ️ No high-confidence evidence detected in this image.")
-            else:
-                st.info("ℹ️ No evidence detected in this image.")
+            # Evidence summary (a fragment: reruns on its own widgets only)
+            render_results()
     else:
         # Instructions when no file is uploaded
-        st.markdown("""
-            <div class="info-card" style="margin-top: 2rem;">
-                <h3 style="color: #2563eb; font-family: 'Orbitron', sans-serif; letter-spacing: 2px;">📖 HOW TO USE</h3>
-                <ol style="color: #4b5563; line-height: 2; font-size: 1.05rem;">
-                    <li><strong style="color: #2563eb;">Upload Image:</strong> Click the upload button above and select a crime scene photograph</li>
-                    <li><strong style="color: #2563eb;">Analyze:</strong> Click the "ANALYZE EVIDENCE" button to process the image</li>
-                    <li><strong style="color: #2563eb;">Review Results:</strong> View detected evidence with confidence scores and visual annotations</li>
-                    <li><strong style="color: #2563eb;">Download Reports:</strong> Export detailed CSV reports and annotated images</li>
-                </ol>
-            </div>
-        """, unsafe_allow_html=True)
-
-        st.markdown("""
-            <div class="info-card">
-                <h3 style="color: #2563eb; font-family: 'Orbitron', sans-serif; letter-spacing: 2px;">⚠️ IMPORTANT NOTES</h3>
-                <ul style="color: #4b5563; line-height: 2; font-size: 1.05rem;">
-                    <li>This system uses advanced AI models for evidence detection</li>
-                    <li>Results should be verified by forensic professionals</li>
-                    <li>Minimum confidence threshold is set to 30% for visualization</li>
-                    <li>All detections are logged regardless of confidence level</li>
-                    <li>Weapon detections trigger critical alerts with pulsing indicators</li>
-                </ul>
-            </div>
-        """, unsafe_allow_html=True)
+        _render_help()
 
 
 if __name__ == "__main__":